@@ -1,18 +1,81 @@
 import streamlit as st
+import pandas as pd
 import sqlite3
 import os
+import threading
+import hashlib
+import json
+from functools import partial
+from contextlib import contextmanager
 from datetime import datetime
+from itertools import groupby
+import zstandard as zstd
 from streamlit_quill import st_quill
+from models import Course, Lesson, Subtopic
 
 # Database file path
 DB_PATH = "cms.db"
 
+# Subtopic content is stored as a BLOB: a one-byte format marker followed by
+# the zstd-compressed UTF-8 HTML. Rows without the marker (plain TEXT written
+# by older versions) are read back unchanged.
+CONTENT_FORMAT_ZSTD = b'\x01'
+CONTENT_ZSTD_LEVEL = 3
+
+# Rich text editor toolbar
+TOOLBAR_OPTIONS = (
+    ('bold', 'italic', 'underline'),
+    ('blockquote', 'code-block'),
+    ({ 'list': 'ordered'}, { 'list': 'bullet' }),
+    ({ 'script': 'sub'}, { 'script': 'super' }),
+    ({ 'indent': '-1'}, { 'indent': '+1' }),
+    ({ 'header': (1, 2, 3, 4, 5, 6, False) },),
+    ({ 'color': () }, { 'background': () }),
+    ({ 'font': () },),
+    ({ 'align': () },),
+    ('clean',),
+)
+
+# SQL statements, kept as module constants so the connection's statement
+# cache (keyed on SQL text) reuses the prepared statement on every call
+SQL_GET_COURSES = 'SELECT id, name, description, icon FROM courses ORDER BY name'
+SQL_COURSE_EXISTS = 'SELECT 1 FROM courses WHERE name = ?'
+SQL_ADD_COURSE = 'INSERT INTO courses (name, description, icon) VALUES (?, ?, ?)'
+SQL_DELETE_COURSE = 'DELETE FROM courses WHERE id = ?'
+# Duplicate checks for a whole batch: titles are passed as one JSON array
+# so the SQL text (and its cached statement) is the same for any batch size
+SQL_LESSONS_EXIST = ('SELECT 1 FROM lessons WHERE course_id = ? '
+                     'AND title IN (SELECT value FROM json_each(?)) LIMIT 1')
+SQL_ADD_LESSON = 'INSERT INTO lessons (course_id, title, order_index) VALUES (?, ?, ?)'
+SQL_DELETE_LESSON = 'DELETE FROM lessons WHERE id = ?'
+SQL_GET_SUBTOPIC = 'SELECT id, lesson_id, title, content, order_index FROM subtopics WHERE id = ?'
+SQL_SUBTOPICS_EXIST = ('SELECT 1 FROM subtopics WHERE lesson_id = ? '
+                       'AND title IN (SELECT value FROM json_each(?)) LIMIT 1')
+SQL_ADD_SUBTOPIC = 'INSERT INTO subtopics (lesson_id, title, content, order_index) VALUES (?, ?, ?, ?)'
+SQL_UPDATE_SUBTOPIC_CONTENT = 'UPDATE subtopics SET content = ? WHERE id = ?'
+SQL_DELETE_SUBTOPIC = 'DELETE FROM subtopics WHERE id = ?'
+# Every lesson of a course joined with its subtopics (content excluded), in
+# display order so rows of the same lesson are adjacent
+SQL_GET_COURSE_TREE = '''
+    SELECT l.id AS lesson_id, l.title AS lesson_title, l.order_index AS lesson_order,
+           s.id AS subtopic_id, s.title AS subtopic_title, s.order_index AS subtopic_order
+    FROM lessons l
+    LEFT JOIN subtopics s ON s.lesson_id = l.id
+    WHERE l.course_id = ?
+    ORDER BY l.order_index, l.title, s.order_index, s.title
+'''
+
 # Initialize database
+@st.cache_resource(show_spinner=False)
 def init_db():
-    """Initialize SQLite database with required tables"""
-    conn = sqlite3.connect(DB_PATH)
+    """Initialize SQLite database with required tables (runs once per server process)"""
+    conn = get_conn()
     c = conn.cursor()
     
+    # WAL journal mode is stored in the database file, so setting it once is
+    # enough; the per-connection settings are applied in get_conn()
+    c.execute('PRAGMA journal_mode=WAL')
+    
     # Table 1: Courses
     c.execute('''
         CREATE TABLE IF NOT EXISTS courses (
@@ -43,7 +106,7 @@ def init_db():
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             lesson_id INTEGER NOT NULL,
             title TEXT NOT NULL,
-            content TEXT,
+            content BLOB,
             order_index INTEGER NOT NULL DEFAULT 0,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (lesson_id) REFERENCES lessons(id) ON DELETE CASCADE,
@@ -51,130 +114,239 @@ def init_db():
         )
     ''')
     
-    conn.commit()
-    conn.close()
+    # Covering indexes for SQL_GET_COURSE_TREE: its lesson filter and join
+    # are index searches that never touch the table rows, and lessons come
+    # out already ordered. SQLite still sorts the subtopic part of the
+    # ORDER BY with a temp B-tree.
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_lessons_course_order
+        ON lessons(course_id, order_index, title)
+    ''')
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_subtopics_lesson_order
+        ON subtopics(lesson_id, order_index, title)
+    ''')
 
 # Database helper functions
-def get_connection():
-    """Get database connection"""
-    return sqlite3.connect(DB_PATH)
+def connect_db():
+    """Open a tuned connection in autocommit mode (isolation_level=None), so
+    every statement outside an explicit transaction commits as it executes"""
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None,
+                           cached_statements=256)
+    conn.row_factory = sqlite3.Row
+    # Per-connection tuning: with WAL, synchronous=NORMAL needs a single
+    # fsync per commit
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA cache_size=-64000')
+    return conn
+
+@st.cache_resource(show_spinner=False)
+def get_conn():
+    """Get the shared database connection (opened once per server process).
+    Helpers never commit or close it."""
+    return connect_db()
+
+@st.cache_resource(show_spinner=False)
+def get_write_conn():
+    """Connection reserved for explicit transactions. Kept apart from the
+    shared connection so other sessions' statements never join (or get
+    rolled back with) an open transaction."""
+    return connect_db()
+
+@st.cache_resource(show_spinner=False)
+def get_write_lock():
+    """Lock serializing explicit transactions on the write connection"""
+    return threading.Lock()
+
+@contextmanager
+def transaction():
+    """Run the enclosed statements in one BEGIN IMMEDIATE ... COMMIT block,
+    rolling back if anything raises"""
+    conn = get_write_conn()
+    with get_write_lock():
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+@st.cache_resource(show_spinner=False)
+def get_db_version_counter():
+    """Process-wide write counter shared by all sessions, with its lock"""
+    return {'value': 0, 'lock': threading.Lock()}
+
+def get_db_version():
+    """Current write counter; passed to the cached getters on every run so
+    a write from any session invalidates every session's cached results"""
+    return get_db_version_counter()['value']
+
+def bump_db_version():
+    """Invalidate cached query results after a write"""
+    counter = get_db_version_counter()
+    with counter['lock']:
+        counter['value'] += 1
+
+def encode_content(content):
+    """Compress subtopic HTML for storage"""
+    return CONTENT_FORMAT_ZSTD + zstd.compress(content.encode('utf-8'), CONTENT_ZSTD_LEVEL)
+
+def decode_content(stored):
+    """Decode a stored content value, accepting legacy uncompressed rows"""
+    if stored is None or isinstance(stored, str):
+        return stored
+    if stored[:1] == CONTENT_FORMAT_ZSTD:
+        return zstd.decompress(stored[1:]).decode('utf-8')
+    return bytes(stored).decode('utf-8')
+
+def is_legacy_content(stored):
+    """Whether a stored value is non-empty content saved before compression"""
+    return bool(stored) and (isinstance(stored, str) or stored[:1] != CONTENT_FORMAT_ZSTD)
 
 # Course operations
-def get_courses():
-    """Get all courses"""
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute('SELECT * FROM courses ORDER BY name')
-    courses = c.fetchall()
-    conn.close()
-    return courses
+# The cached getters below are keyed on db_version, which only increases, so
+# entries for old versions are never read again; max_entries bounds them
+# (one course list, and a few course trees for sessions on different courses)
+@st.cache_data(show_spinner=False, max_entries=1)
+def get_courses(version):
+    """Get all courses (cached per db_version)"""
+    conn = get_conn()
+    return [Course(**row) for row in conn.execute(SQL_GET_COURSES)]
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def get_course_options(version):
+    """Map dropdown labels to course IDs (cached per db_version)"""
+    return {f"{course.name} (ID: {course.id})": course.id
+            for course in get_courses(version)}
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def get_courses_by_id(version):
+    """Map course IDs to their Course rows (cached per db_version)"""
+    return {course.id: course for course in get_courses(version)}
 
 def add_course(name, description, icon):
     """Add a new course"""
-    conn = get_connection()
-    c = conn.cursor()
+    conn = get_conn()
+    # Cheap indexed lookup for the common duplicate case (e.g. a double
+    # submit); the UNIQUE constraint below still guards against races
+    if conn.execute(SQL_COURSE_EXISTS, (name,)).fetchone():
+        return False
     try:
-        c.execute('INSERT INTO courses (name, description, icon) VALUES (?, ?, ?)',
-                 (name, description, icon))
-        conn.commit()
-        return True
+        conn.execute(SQL_ADD_COURSE, (name, description, icon))
     except sqlite3.IntegrityError:
         return False
-    finally:
-        conn.close()
+    bump_db_version()
+    return True
 
 def delete_course(course_id):
     """Delete a course (cascades to lessons and subtopics)"""
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute('DELETE FROM courses WHERE id = ?', (course_id,))
-    conn.commit()
-    conn.close()
+    conn = get_conn()
+    conn.execute(SQL_DELETE_COURSE, (course_id,))
+    bump_db_version()
 
 # Lesson operations
-def get_lessons(course_id):
-    """Get all lessons for a course"""
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute('SELECT * FROM lessons WHERE course_id = ? ORDER BY order_index, title',
-              (course_id,))
-    lessons = c.fetchall()
-    conn.close()
-    return lessons
-
-def add_lesson(course_id, title, order_index):
-    """Add a new lesson"""
-    conn = get_connection()
-    c = conn.cursor()
+def add_lessons(course_id, rows):
+    """Add several (title, order_index) lessons in one transaction.
+    Returns False, adding none of them, if any title already exists."""
+    titles = json.dumps([title for title, _ in rows])
     try:
-        c.execute('INSERT INTO lessons (course_id, title, order_index) VALUES (?, ?, ?)',
-                 (course_id, title, order_index))
-        conn.commit()
-        return True
+        with transaction() as write_conn:
+            if write_conn.execute(SQL_LESSONS_EXIST, (course_id, titles)).fetchone():
+                return False
+            write_conn.executemany(SQL_ADD_LESSON,
+                                   [(course_id, title, order_index) for title, order_index in rows])
     except sqlite3.IntegrityError:
         return False
-    finally:
-        conn.close()
+    bump_db_version()
+    return True
+
+def add_lesson(course_id, title, order_index):
+    """Add a new lesson"""
+    return add_lessons(course_id, [(title, order_index)])
 
 def delete_lesson(lesson_id):
     """Delete a lesson (cascades to subtopics)"""
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute('DELETE FROM lessons WHERE id = ?', (lesson_id,))
-    conn.commit()
-    conn.close()
+    conn = get_conn()
+    conn.execute(SQL_DELETE_LESSON, (lesson_id,))
+    bump_db_version()
 
 # Subtopic operations
-def get_subtopics(lesson_id):
-    """Get all subtopics for a lesson"""
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute('SELECT * FROM subtopics WHERE lesson_id = ? ORDER BY order_index, title',
-              (lesson_id,))
-    subtopics = c.fetchall()
-    conn.close()
-    return subtopics
-
-def add_subtopic(lesson_id, title, order_index):
-    """Add a new subtopic"""
-    conn = get_connection()
-    c = conn.cursor()
+def add_subtopics(lesson_id, rows):
+    """Add several (title, order_index) subtopics with empty content in one
+    transaction. Returns False, adding none of them, if any title already exists."""
+    titles = json.dumps([title for title, _ in rows])
     try:
-        c.execute('INSERT INTO subtopics (lesson_id, title, content, order_index) VALUES (?, ?, ?, ?)',
-                 (lesson_id, title, '', order_index))
-        conn.commit()
-        return True
+        with transaction() as write_conn:
+            if write_conn.execute(SQL_SUBTOPICS_EXIST, (lesson_id, titles)).fetchone():
+                return False
+            write_conn.executemany(SQL_ADD_SUBTOPIC,
+                                   [(lesson_id, title, '', order_index) for title, order_index in rows])
     except sqlite3.IntegrityError:
         return False
-    finally:
-        conn.close()
+    bump_db_version()
+    return True
+
+def add_subtopic(lesson_id, title, order_index):
+    """Add a new subtopic"""
+    return add_subtopics(lesson_id, [(title, order_index)])
+
+def content_hash(content):
+    """Digest used to spot saves that would not change the stored content"""
+    return hashlib.blake2b((content or '').encode('utf-8'), digest_size=16).digest()
 
 def update_subtopic_content(subtopic_id, content):
-    """Update subtopic content"""
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute('UPDATE subtopics SET content = ? WHERE id = ?', (content, subtopic_id))
-    conn.commit()
-    conn.close()
+    """Update subtopic content. Skips the write, returning False, when the
+    content matches what get_subtopic last loaded for this session."""
+    hash_key = f"content_hash_{subtopic_id}"
+    new_hash = content_hash(content)
+    if st.session_state.get(hash_key) == new_hash:
+        return False
+    conn = get_conn()
+    conn.execute(SQL_UPDATE_SUBTOPIC_CONTENT, (encode_content(content), subtopic_id))
+    st.session_state[hash_key] = new_hash
+    bump_db_version()
+    return True
 
 def delete_subtopic(subtopic_id):
     """Delete a subtopic"""
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute('DELETE FROM subtopics WHERE id = ?', (subtopic_id,))
-    conn.commit()
-    conn.close()
+    conn = get_conn()
+    conn.execute(SQL_DELETE_SUBTOPIC, (subtopic_id,))
+    bump_db_version()
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def get_course_tree(version, course_id):
+    """Get (lessons, subtopics_by_lesson_id) for a course with one
+    SQL_GET_COURSE_TREE query (cached per db_version). Subtopic content is
+    left out; use get_subtopic for it."""
+    conn = get_conn()
+    lessons, subtopics_by_lesson = [], {}
+    rows = conn.execute(SQL_GET_COURSE_TREE, (course_id,))
+    for (lesson_id, title, order_index), group in groupby(
+            rows, key=lambda row: (row['lesson_id'], row['lesson_title'], row['lesson_order'])):
+        lessons.append(Lesson(lesson_id, course_id, title, order_index))
+        subtopics_by_lesson[lesson_id] = [
+            Subtopic(row['subtopic_id'], lesson_id, row['subtopic_title'], row['subtopic_order'])
+            for row in group if row['subtopic_id'] is not None
+        ]
+    return lessons, subtopics_by_lesson
 
 def get_subtopic(subtopic_id):
-    """Get a single subtopic by ID"""
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute('SELECT * FROM subtopics WHERE id = ?', (subtopic_id,))
-    subtopic = c.fetchone()
-    conn.close()
-    return subtopic
+    """Get a single subtopic by ID, including its content"""
+    conn = get_conn()
+    row = conn.execute(SQL_GET_SUBTOPIC, (subtopic_id,)).fetchone()
+    if row is None:
+        return None
+    content = decode_content(row['content'])
+    if is_legacy_content(row['content']):
+        # Transcode on read; content is not part of any cached result, so
+        # there is nothing to invalidate
+        conn.execute(SQL_UPDATE_SUBTOPIC_CONTENT, (encode_content(content), subtopic_id))
+    st.session_state[f"content_hash_{subtopic_id}"] = content_hash(content)
+    return Subtopic(row['id'], row['lesson_id'], row['title'], row['order_index'], content)
 
-# Initialize database on startup
+# Initialize database on startup; cached, so later reruns skip it
 init_db()
 
 # Page configuration
@@ -223,11 +395,11 @@ st.sidebar.markdown("<h1 class='main-header'>📚 CMS</h1>", unsafe_allow_html=T
 st.sidebar.markdown("### Select or Add Course")
 
 # Get all courses
-courses = get_courses()
+courses = get_courses(get_db_version())
 
 # Course selection dropdown
 if courses:
-    course_options = {f"{course[1]} (ID: {course[0]})": course[0] for course in courses}
+    course_options = get_course_options(get_db_version())
     selected_course_name = st.sidebar.selectbox(
         "Choose a course:",
         options=list(course_options.keys()),
@@ -259,87 +431,124 @@ with st.sidebar.form("add_course_form", clear_on_submit=True):
         else:
             st.sidebar.error("❌ Course name is required!")
 
+# Drop a selected lesson or subtopic that is not part of the current
+# selection (another course was picked, or it was deleted)
+if st.session_state.selected_course_id:
+    _, subtopics_by_lesson = get_course_tree(get_db_version(), st.session_state.selected_course_id)
+else:
+    subtopics_by_lesson = {}
+if st.session_state.selected_lesson_id not in subtopics_by_lesson:
+    st.session_state.selected_lesson_id = None
+if st.session_state.selected_subtopic_id not in {
+        subtopic.id for subtopic in subtopics_by_lesson.get(st.session_state.selected_lesson_id, [])}:
+    st.session_state.selected_subtopic_id = None
+
 # Main Page
 st.markdown("<h1 class='main-header'>Course Management System</h1>", unsafe_allow_html=True)
 
-# Main Page Top - Lessons Section
-if st.session_state.selected_course_id:
-    # Get course info
-    selected_course = next((c for c in courses if c[0] == st.session_state.selected_course_id), None)
+# Each main-page section is a fragment: changes that only affect one section
+# (adding a lesson or subtopic, editing content) rerun just that section via
+# st.rerun(scope="fragment"), while selection changes and deletes, which
+# affect the sections below, still rerun the whole app. Fragments are rerun
+# with their original arguments, so each one fetches its own (cached) data.
+
+def on_table_select(table_key, row_ids, selected_key, clear_keys=()):
+    """Dataframe on_select callback: map the selected row index back to its
+    ID. Runs only for user selections, so a table that was re-created
+    because its rows changed never clears the current selection."""
+    rows = st.session_state[table_key].selection.rows
+    selected_id = row_ids[rows[0]] if rows else None
+    if selected_id != st.session_state[selected_key]:
+        st.session_state[selected_key] = selected_id
+        for key in clear_keys:
+            st.session_state[key] = None
+        st.session_state.selection_changed = True
+
+@st.fragment
+def render_lessons_section(course_id):
+    """Lessons table plus the add-lesson form for the selected course"""
+    lessons, _ = get_course_tree(get_db_version(), course_id)
     
-    if selected_course:
-        st.markdown(f"<div class='section-header'>📖 Lessons in: {selected_course[1]} {selected_course[3] if selected_course[3] else ''}</div>", 
-                   unsafe_allow_html=True)
-        
-        # Get lessons for selected course
-        lessons = get_lessons(st.session_state.selected_course_id)
+    # Display lessons as one selectable table. Row indices only mean
+    # something for the rows they were picked from, so the table is keyed on
+    # its row IDs and the selection is kept by ID in session_state.
+    if lessons:
+        lesson_ids = [lesson.id for lesson in lessons]
+        table_key = f"lessons_table_{course_id}_{hash(tuple(lesson_ids))}"
+        st.dataframe(
+            pd.DataFrame([(lesson.title, lesson.order_index) for lesson in lessons],
+                         columns=["Lesson", "Order"]),
+            on_select=partial(on_table_select, table_key, lesson_ids,
+                              'selected_lesson_id', ('selected_subtopic_id',)),
+            selection_mode="single-row",
+            hide_index=True,
+            use_container_width=True,
+            key=table_key
+        )
+        if st.session_state.pop('selection_changed', False):
+            st.rerun()
+        selected_lesson = next((lesson for lesson in lessons
+                                if lesson.id == st.session_state.selected_lesson_id), None)
+        if selected_lesson:
+            st.caption(f"Selected lesson: **{selected_lesson.title}**")
+        if selected_lesson and st.button("🗑️ Delete selected lesson", key="delete_lesson"):
+            delete_lesson(selected_lesson.id)
+            st.session_state.selected_lesson_id = None
+            st.session_state.selected_subtopic_id = None
+            st.success(f"Lesson '{selected_lesson.title}' deleted!")
+            st.rerun()
+    
+    # Add New Lesson Form
+    st.markdown("---")
+    with st.form("add_lesson_form", clear_on_submit=True):
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            lesson_title = st.text_input("Lesson Title *", placeholder="e.g., Introduction to Variables")
+        with col2:
+            lesson_order = st.number_input("Order", min_value=0, value=0, step=1)
         
-        # Display lessons in columns
-        if lessons:
-            cols = st.columns(3)
-            for idx, lesson in enumerate(lessons):
-                with cols[idx % 3]:
-                    with st.container():
-                        st.markdown(f"**{lesson[2]}** (Order: {lesson[3]})")
-                        if st.button(f"Select", key=f"select_lesson_{lesson[0]}"):
-                            st.session_state.selected_lesson_id = lesson[0]
-                            st.session_state.selected_subtopic_id = None
-                            st.rerun()
-                        if st.button(f"🗑️ Delete", key=f"delete_lesson_{lesson[0]}"):
-                            delete_lesson(lesson[0])
-                            if st.session_state.selected_lesson_id == lesson[0]:
-                                st.session_state.selected_lesson_id = None
-                            st.success(f"Lesson '{lesson[2]}' deleted!")
-                            st.rerun()
+        submitted = st.form_submit_button("➕ Add Lesson", use_container_width=True)
         
-        # Add New Lesson Form
-        st.markdown("---")
-        with st.form("add_lesson_form", clear_on_submit=True):
-            col1, col2 = st.columns([3, 1])
-            with col1:
-                lesson_title = st.text_input("Lesson Title *", placeholder="e.g., Introduction to Variables")
-            with col2:
-                lesson_order = st.number_input("Order", min_value=0, value=0, step=1)
-            
-            submitted = st.form_submit_button("➕ Add Lesson", use_container_width=True)
-            
-            if submitted:
-                if lesson_title:
-                    if add_lesson(st.session_state.selected_course_id, lesson_title, lesson_order):
-                        st.success(f"✅ Lesson '{lesson_title}' added!")
-                        st.rerun()
-                    else:
-                        st.error("❌ Lesson with this title already exists in this course!")
+        if submitted:
+            if lesson_title:
+                if add_lesson(course_id, lesson_title, lesson_order):
+                    st.success(f"✅ Lesson '{lesson_title}' added!")
+                    st.rerun(scope="fragment")
                 else:
-                    st.error("❌ Lesson title is required!")
-    else:
-        st.warning("Course not found!")
-else:
-    st.info("👈 Please select a course from the sidebar to view lessons.")
+                    st.error("❌ Lesson with this title already exists in this course!")
+            else:
+                st.error("❌ Lesson title is required!")
 
-# Main Page Middle - Subtopics Section
-if st.session_state.selected_lesson_id:
-    st.markdown("<div class='section-header'>📑 Subtopics</div>", unsafe_allow_html=True)
-    
-    # Get subtopics for selected lesson
-    subtopics = get_subtopics(st.session_state.selected_lesson_id)
+@st.fragment
+def render_subtopics_section(course_id, lesson_id):
+    """Subtopics table plus the add-subtopic form for the selected lesson"""
+    _, subtopics_by_lesson = get_course_tree(get_db_version(), course_id)
+    subtopics = subtopics_by_lesson.get(lesson_id, [])
     
-    # Display subtopics
+    # Display subtopics as one selectable table (keyed on row IDs, as above)
     if subtopics:
-        cols = st.columns(3)
-        for idx, subtopic in enumerate(subtopics):
-            with cols[idx % 3]:
-                with st.container():
-                    st.markdown(f"**{subtopic[2]}** (Order: {subtopic[4]})")
-                    if st.button(f"Select", key=f"select_subtopic_{subtopic[0]}"):
-                        st.session_state.selected_subtopic_id = subtopic[0]
-                        st.rerun()
-                    if st.button(f"🗑️ Delete", key=f"delete_subtopic_{subtopic[0]}"):
-                        delete_subtopic(subtopic[0])
-                        if st.session_state.selected_subtopic_id == subtopic[0]:
-                            st.session_state.selected_subtopic_id = None
-                        st.success(f"Subtopic '{subtopic[2]}' deleted!")
-                        st.rerun()
+        subtopic_ids = [subtopic.id for subtopic in subtopics]
+        table_key = f"subtopics_table_{lesson_id}_{hash(tuple(subtopic_ids))}"
+        st.dataframe(
+            pd.DataFrame([(subtopic.title, subtopic.order_index) for subtopic in subtopics],
+                         columns=["Subtopic", "Order"]),
+            on_select=partial(on_table_select, table_key, subtopic_ids, 'selected_subtopic_id'),
+            selection_mode="single-row",
+            hide_index=True,
+            use_container_width=True,
+            key=table_key
+        )
+        if st.session_state.pop('selection_changed', False):
+            st.rerun()
+        selected_subtopic = next((subtopic for subtopic in subtopics
+                                  if subtopic.id == st.session_state.selected_subtopic_id), None)
+        if selected_subtopic:
+            st.caption(f"Selected subtopic: **{selected_subtopic.title}**")
+        if selected_subtopic and st.button("🗑️ Delete selected subtopic", key="delete_subtopic"):
+            delete_subtopic(selected_subtopic.id)
+            st.session_state.selected_subtopic_id = None
+            st.success(f"Subtopic '{selected_subtopic.title}' deleted!")
+            st.rerun()
     
     # Add New Subtopic Form
     st.markdown("---")
@@ -354,61 +563,61 @@ if st.session_state.selected_lesson_id:
         
         if submitted:
             if subtopic_title:
-                if add_subtopic(st.session_state.selected_lesson_id, subtopic_title, subtopic_order):
+                if add_subtopic(lesson_id, subtopic_title, subtopic_order):
                     st.success(f"✅ Subtopic '{subtopic_title}' added!")
-                    st.rerun()
+                    st.rerun(scope="fragment")
                 else:
                     st.error("❌ Subtopic with this title already exists in this lesson!")
             else:
                 st.error("❌ Subtopic title is required!")
-else:
-    if st.session_state.selected_course_id:
-        st.info("👆 Please select a lesson above to view subtopics.")
 
-# Main Page Bottom - Rich Text Editor
-if st.session_state.selected_subtopic_id:
-    st.markdown("<div class='section-header'>✏️ Rich Text Editor</div>", unsafe_allow_html=True)
-    
+def save_subtopic_content(subtopic_id):
+    """Save button callback: persist the editor's current value. Only records
+    the outcome; render_editor_section shows it, since callbacks must not
+    display elements during a fragment rerun."""
+    content = st.session_state.get(f"editor_{subtopic_id}")
+    saved = content is not None and update_subtopic_content(subtopic_id, content)
+    st.session_state.save_result = (subtopic_id, saved)
+
+@st.fragment
+def render_editor_section(subtopic_id):
+    """Rich text editor, save button and preview for the selected subtopic"""
     # Get subtopic details
-    subtopic = get_subtopic(st.session_state.selected_subtopic_id)
+    subtopic = get_subtopic(subtopic_id)
     
     if subtopic:
-        st.markdown(f"**Editing:** {subtopic[2]}")
+        st.markdown(f"**Editing:** {subtopic.title}")
         
         # Rich Text Editor with streamlit-quill
-        # Configure toolbar options
-        toolbar_options = [
-            ['bold', 'italic', 'underline'],
-            ['blockquote', 'code-block'],
-            [{ 'list': 'ordered'}, { 'list': 'bullet' }],
-            [{ 'script': 'sub'}, { 'script': 'super' }],
-            [{ 'indent': '-1'}, { 'indent': '+1' }],
-            [{ 'header': [1, 2, 3, 4, 5, 6, False] }],
-            [{ 'color': [] }, { 'background': [] }],
-            [{ 'font': [] }],
-            [{ 'align': [] }],
-            ['clean']
-        ]
-        
-        # Get current content or empty string
-        current_content = subtopic[3] if subtopic[3] else ""
+        # Seed the editor with the stored content when it mounts and keep
+        # passing that same value while it stays mounted: the editor's own
+        # state (under its stable key) holds the user's edits, so saving does
+        # not push the content back and re-render the editor. Streamlit drops
+        # that state whenever the editor is not rendered, so a missing key
+        # means a fresh mount and the seed is refreshed from the database.
+        editor_key = f"editor_{subtopic.id}"
+        seed = st.session_state.get('editor_seed')
+        if editor_key not in st.session_state or seed is None or seed[0] != subtopic.id:
+            seed = (subtopic.id, subtopic.content or "")
+            st.session_state.editor_seed = seed
         
         # Rich text editor
         content = st_quill(
-            value=current_content,
+            value=seed[1],
             html=True,
-            toolbar=toolbar_options,
-            key=f"editor_{subtopic[0]}",
+            toolbar=TOOLBAR_OPTIONS,
+            key=editor_key,
             height=400
         )
         
         # Save button
         col1, col2 = st.columns([1, 4])
         with col1:
-            if st.button("💾 Save Content", use_container_width=True, type="primary"):
-                update_subtopic_content(st.session_state.selected_subtopic_id, content)
-                st.success("✅ Content saved successfully!")
-                st.rerun()
+            st.button("💾 Save Content", use_container_width=True, type="primary",
+                      on_click=save_subtopic_content, args=(subtopic.id,))
+        save_result = st.session_state.pop('save_result', None)
+        if save_result and save_result[0] == subtopic.id:
+            st.toast("✅ Content saved!" if save_result[1] else "No changes to save")
         
         # Display current content preview
         if content:
@@ -417,9 +626,36 @@ if st.session_state.selected_subtopic_id:
             st.markdown(content, unsafe_allow_html=True)
     else:
         st.error("Subtopic not found!")
+
+# Main Page Top - Lessons Section
+if st.session_state.selected_course_id:
+    # Get course info
+    selected_course = get_courses_by_id(get_db_version()).get(st.session_state.selected_course_id)
+    
+    if selected_course:
+        st.markdown(f"<div class='section-header'>📖 Lessons in: {selected_course.name} {selected_course.icon or ''}</div>", 
+                   unsafe_allow_html=True)
+        render_lessons_section(selected_course.id)
+    else:
+        st.warning("Course not found!")
+else:
+    st.info("👈 Please select a course from the sidebar to view lessons.")
+
+# Main Page Middle - Subtopics Section
+if st.session_state.selected_lesson_id:
+    st.markdown("<div class='section-header'>📑 Subtopics</div>", unsafe_allow_html=True)
+    render_subtopics_section(st.session_state.selected_course_id,
+                             st.session_state.selected_lesson_id)
+else:
+    if st.session_state.selected_course_id:
+        st.info("👆 Please select a lesson above to view subtopics.")
+
+# Main Page Bottom - Rich Text Editor
+if st.session_state.selected_subtopic_id:
+    st.markdown("<div class='section-header'>✏️ Rich Text Editor</div>", unsafe_allow_html=True)
+    render_editor_section(st.session_state.selected_subtopic_id)
 else:
     if st.session_state.selected_lesson_id:
         st.info("👆 Please select a subtopic above to edit content.")
     elif st.session_state.selected_course_id:
         st.info("👆 Please select a lesson to manage subtopics.")
-
@@ -0,0 +1,33 @@
+"""Row types returned by the CMS query helpers.
+
+They live outside app.py because st.cache_data pickles them: Streamlit
+re-creates the main script module on every run, so classes defined there
+would not be the same objects from one run (or session) to the next.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(slots=True)
+class Course:
+    id: int
+    name: str
+    description: str
+    icon: str
+
+
+@dataclass(slots=True)
+class Lesson:
+    id: int
+    course_id: int
+    title: str
+    order_index: int
+
+
+@dataclass(slots=True)
+class Subtopic:
+    id: int
+    lesson_id: int
+    title: str
+    order_index: int
+    content: Optional[str] = None  # only loaded by get_subtopic